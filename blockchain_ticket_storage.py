@@ -4,31 +4,50 @@ import os
 import io
 import asyncio
 import base64
-import json
 import random
+import re
 import time
 import traceback
 from binascii import unhexlify, hexlify
 import urllib.parse as urlparse
 from decimal import Decimal
+import orjson
 import plyvel
 import shutil
 import tempfile
+import threading
 import zstandard as zstd
 from httpx import AsyncClient, Limits, Timeout
+from decouple import Config as DecoupleConfig, RepositoryEnv
 from logger_config import logger
 import database_code as db_code
 
+config = DecoupleConfig(RepositoryEnv('.env'))
+max_concurrent_requests = config.get("MAXIMUM_NUMBER_OF_CONCURRENT_RPC_REQUESTS", default=20, cast=int) # also sizes the httpx connection pool so callers queue on the semaphore only
 base_transaction_amount = Decimal(0.1)
-max_concurrent_requests = 1000
 FEEPERKB = Decimal(0.00001)
 COIN = 100000 # patoshis in 1 PSL
+MULTISIG_OUTPUT_DATA_SIZE = 65*3 # data bytes carried by each 1-of-3 multisig output
+FEEPERKB_IN_PATOSHIS = round(FEEPERKB * COIN)
+BASE_TRANSACTION_AMOUNT_IN_PATOSHIS = round(base_transaction_amount * COIN)
+MULTISIG_OUTPUT_VALUE_IN_PATOSHIS = 100
+MAX_STANDARD_TX_SIZE = 100000 # node relay policy limit; larger transactions are rejected by sendrawtransaction
+P2PKH_SCRIPTSIG_MAX_SIZE = 108 # push of DER signature + sighash byte (up to 74) and push of compressed pubkey (34)
 OP_CHECKSIG = b'\xac'
 OP_CHECKMULTISIG = b'\xae'
 OP_PUSHDATA1 = b'\x4c'
 OP_DUP = b'\x76'
 OP_HASH160 = b'\xa9'
 OP_EQUALVERIFY = b'\x88'
+_LE_H = struct.Struct('<H').pack  # Precompiled little-endian packers for transaction serialization
+_LE_I = struct.Struct('<I').pack
+_LE_Q = struct.Struct('<Q').pack
+STORAGE_TICKET_IDENTIFIER = "CREDIT_PACK_STORAGE_TICKET"
+_address_ismine_cache = {}
+_pastel_conf_setting_pattern = re.compile(r'^[ \t]*([^\s=#]+)[ \t]*=[ \t]*(.*?)[ \t]*$', re.M)
+# Default to 19, the highest non-ultra level; the ultra levels (20-22) cost far more CPU and memory for a marginal gain in ratio
+zstd_compression_level = config.get("ZSTD_COMPRESSION_LEVEL", default=19, cast=int)
+_zstd_thread_local = threading.local()
     
 def get_network_info(rpc_port):
     if rpc_port == '9932':
@@ -80,12 +99,14 @@ class AsyncAuthServiceProxy:
         self.service_url = service_url
         self.service_name = service_name
         self.url = urlparse.urlparse(service_url)        
-        self.client = AsyncClient(timeout=Timeout(request_timeout), limits=Limits(max_connections=max_concurrent_requests, max_keepalive_connections=100))
+        self.client = AsyncClient(http2=True, timeout=Timeout(request_timeout), limits=Limits(max_connections=max_concurrent_requests, max_keepalive_connections=max_concurrent_requests))
         self.id_count = 0
         user = self.url.username
         password = self.url.password
         authpair = f"{user}:{password}".encode('utf-8')
         self.auth_header = b'Basic ' + base64.b64encode(authpair)
+        self.headers = self.build_headers()
+        self._method_cache = {}  # Method name -> child proxy; the same dict is shared by every proxy derived from this one
         self.reconnect_timeout = reconnect_timeout
         self.max_retries = max_retries
         self.request_timeout = request_timeout
@@ -98,81 +119,97 @@ class AsyncAuthServiceProxy:
         self.health_check_endpoint = "/health"
         self.health_check_interval = 60
         self.use_health_check = 0
+        # Child proxies copy this __dict__, so mutable connection state (circuit breaker, fallback URL, headers, request ids) is
+        # always read and written through the root proxy; otherwise each cached method proxy would trip and fail over on its own
+        self._root = self
 
     def __getattr__(self, name):
         if name.startswith('__') and name.endswith('__'):
             raise AttributeError
         if self.service_name is not None:
             name = f"{self.service_name}.{name}"
-        return AsyncAuthServiceProxy(self.service_url, name)
+        child_proxy = self._method_cache.get(name)
+        if child_proxy is None:
+            # Share the parent's AsyncClient (and its keep-alive connection pool), parsed URL and auth header instead of re-running __init__
+            child_proxy = object.__new__(type(self))
+            child_proxy.__dict__.update(self.__dict__)
+            child_proxy.service_name = name
+            self._method_cache[name] = child_proxy
+        return child_proxy
 
     async def __call__(self, *args):
-        async with self._semaphore:  # Acquire a semaphore
-            if self.circuit_breaker_open:
-                if self.circuit_breaker_timeout > 0:
-                    logger.warning("Circuit breaker is open. Waiting for timeout...")
-                    await asyncio.sleep(self.circuit_breaker_timeout)
-                    self.circuit_breaker_timeout = 0
-                else:
-                    logger.info("Testing circuit breaker with a request...")
-                    self.circuit_breaker_failure_count = 0
-            self.id_count += 1
-            postdata = json.dumps({
-                'version': '1.1',
-                'method': self.service_name,
-                'params': args,
-                'id': self.id_count
-            }, default=EncodeDecimal)
-            headers = {
-                'Host': self.url.hostname,
-                'User-Agent': "AuthServiceProxy/0.1",
-                'Authorization': self.auth_header,
-                'Content-type': 'application/json'
-            }
-            start_time = time.time()
-            for i in range(self.max_retries):
-                try:
-                    if i > 0:
-                        logger.warning(f"Retry attempt #{i+1}")
-                        sleep_time = min(self.reconnect_timeout * (2 ** i) + random.uniform(0, self.reconnect_timeout), self.max_backoff_time)
-                        logger.info(f"Waiting for {sleep_time:.2f} seconds before retrying.")
-                        await asyncio.sleep(sleep_time)
+        state = self._root
+        # Only the HTTP round-trip holds a semaphore permit; circuit-breaker and retry backoff sleeps must not block other RPCs
+        if state.circuit_breaker_open:
+            if state.circuit_breaker_timeout > 0:
+                logger.warning("Circuit breaker is open. Waiting for timeout...")
+                await asyncio.sleep(state.circuit_breaker_timeout)
+                state.circuit_breaker_timeout = 0
+            else:
+                logger.info("Testing circuit breaker with a request...")
+                state.circuit_breaker_failure_count = 0
+        state.id_count += 1
+        postdata = orjson.dumps({
+            'version': '1.1',
+            'method': self.service_name,
+            'params': args,
+            'id': state.id_count
+        }, default=EncodeDecimal)
+        start_time = time.time()
+        for i in range(self.max_retries):
+            try:
+                if i > 0:
+                    logger.warning(f"Retry attempt #{i+1}")
+                    sleep_time = min(self.reconnect_timeout * (2 ** i) + random.uniform(0, self.reconnect_timeout), self.max_backoff_time)
+                    logger.info(f"Waiting for {sleep_time:.2f} seconds before retrying.")
+                    await asyncio.sleep(sleep_time)
+                async with self._semaphore:  # Acquire a semaphore
                     if self.use_health_check:
                         await self.health_check()
                     response = await self.client.post(
-                        self.service_url, headers=headers, data=postdata)
-                    self.circuit_breaker_failure_count = 0
-                    self.circuit_breaker_open = False
-                    elapsed_time = time.time() - start_time
-                    self.adapt_circuit_breaker_timeout(elapsed_time)
-                    break
-                except Exception as e:
-                    logger.error(f"Error occurred in __call__: {e}")
-                    logger.exception("Full stack trace:")
-                    self.circuit_breaker_failure_count += 1
-                    if self.circuit_breaker_failure_count >= self.circuit_breaker_failure_threshold:
-                        logger.warning("Circuit breaker threshold reached. Opening circuit.")
-                        self.circuit_breaker_open = True
-                        self.circuit_breaker_timeout = 60
-                        if self.fallback_url:
-                            logger.info("Switching to fallback URL.")
-                            self.service_url = self.fallback_url
-                            self.url = urlparse.urlparse(self.service_url)
-            else:
-                logger.error("Max retries exceeded.")
-                return
-            response_json = response.json()
-            if response_json['error'] is not None:
-                raise JSONRPCException(response_json['error'])
-            elif 'result' not in response_json:
-                raise JSONRPCException({
-                    'code': -343, 'message': 'missing JSON-RPC result'})
-            else:
-                return response_json['result']
+                        state.service_url, headers=state.headers, content=postdata)
+                state.circuit_breaker_failure_count = 0
+                state.circuit_breaker_open = False
+                elapsed_time = time.time() - start_time
+                state.adapt_circuit_breaker_timeout(elapsed_time)
+                break
+            except Exception as e:
+                logger.error(f"Error occurred in __call__: {e}")
+                logger.exception("Full stack trace:")
+                state.circuit_breaker_failure_count += 1
+                if state.circuit_breaker_failure_count >= state.circuit_breaker_failure_threshold:
+                    logger.warning("Circuit breaker threshold reached. Opening circuit.")
+                    state.circuit_breaker_open = True
+                    state.circuit_breaker_timeout = 60
+                    if state.fallback_url:
+                        logger.info("Switching to fallback URL.")
+                        state.service_url = state.fallback_url
+                        state.url = urlparse.urlparse(state.service_url)
+                        state.headers = state.build_headers()  # Every method proxy picks up the fallback host through the root
+        else:
+            logger.error("Max retries exceeded.")
+            return
+        response_json = orjson.loads(response.content)
+        if response_json['error'] is not None:
+            raise JSONRPCException(response_json['error'])
+        elif 'result' not in response_json:
+            raise JSONRPCException({
+                'code': -343, 'message': 'missing JSON-RPC result'})
+        else:
+            return response_json['result']
+
+    def build_headers(self):
+        # Built once per URL and shared with child proxies instead of being rebuilt on every call
+        return {
+            'Host': self.url.hostname,
+            'User-Agent': "AuthServiceProxy/0.1",
+            'Authorization': self.auth_header,
+            'Content-type': 'application/json'
+        }
 
     async def health_check(self):
         try:
-            health_check_url = self.service_url + self.health_check_endpoint
+            health_check_url = self._root.service_url + self.health_check_endpoint
             response = await self.client.get(health_check_url)
             if response.status_code != 200:
                 raise Exception("Health check failed.")
@@ -194,81 +231,143 @@ def get_sha3_256_hash(input_data):
 def get_raw_sha3_256_hash(input_data):
     if isinstance(input_data, str):
         input_data = input_data.encode('utf-8')
-    return hashlib.sha3_256(input_data).digest()
+    return _sha3(input_data)
+
+def _sha3(input_bytes: bytes) -> bytes:
+    # One-shot digest over an already-encoded buffer; skips the str check in the store/retrieve hot paths
+    return hashlib.sha3_256(input_bytes).digest()
+
+def _sha256(input_bytes: bytes) -> bytes:
+    # SHA-256 is dispatched by OpenSSL to SHA-NI/AVX2 code paths, unlike SHA3-256
+    return hashlib.sha256(input_bytes).digest()
+
+def _digest_matches(input_bytes: bytes, expected_digest: bytes) -> bool:
+    # Tickets stored before the switch to SHA-256 carry SHA3-256 digests in their header
+    return _sha256(input_bytes) == expected_digest or _sha3(input_bytes) == expected_digest
         
+def get_zstd_compressor():
+    # Reused rather than rebuilt per call (high levels allocate large match-finder tables), but kept per thread since
+    # compression runs in worker threads and zstd contexts must not be used concurrently
+    zstandard_compressor = getattr(_zstd_thread_local, 'compressor', None)
+    if zstandard_compressor is None:
+        zstandard_compressor = zstd.ZstdCompressor(level=zstd_compression_level, write_content_size=True, write_checksum=True)
+        _zstd_thread_local.compressor = zstandard_compressor
+    return zstandard_compressor
+
+def get_zstd_decompressor():
+    zstandard_decompressor = getattr(_zstd_thread_local, 'decompressor', None)
+    if zstandard_decompressor is None:
+        zstandard_decompressor = zstd.ZstdDecompressor()
+        _zstd_thread_local.decompressor = zstandard_decompressor
+    return zstandard_decompressor
+
 def compress_data(input_data):
     if isinstance(input_data, str):
         input_data = input_data.encode('utf-8')
-    zstd_compression_level = 22
-    zstandard_compressor = zstd.ZstdCompressor(level=zstd_compression_level, write_content_size=True, write_checksum=True)
-    zstd_compressed_data = zstandard_compressor.compress(input_data)
+    zstd_compressed_data = get_zstd_compressor().compress(input_data)
     return zstd_compressed_data
 
 def decompress_data(compressed_data):
-    return zstd.decompress(compressed_data)
+    return get_zstd_decompressor().decompress(compressed_data)
+
+def psl_to_patoshis(amount):
+    # Amounts are tracked internally as int patoshis; RPC results (floats) and Decimal settings are converted once at the boundary
+    return round(amount * COIN)
 
 async def get_unspent_transactions():
     global rpc_connection
     unspent_transactions = await rpc_connection.listunspent()
     return unspent_transactions
 
+async def address_is_mine(address):
+    global rpc_connection
+    # Ownership of a wallet address doesn't change, so only the first lookup per address needs a validateaddress round-trip
+    is_mine = _address_ismine_cache.get(address)
+    if is_mine is None:
+        address_info = await rpc_connection.validateaddress(address)
+        is_mine = bool(address_info['ismine'] or address_info['iswatchonly'])
+        _address_ismine_cache[address] = is_mine
+    return is_mine
+
 async def select_txins(value, number_of_utxos_to_review=10):
+    # value and the returned total are in patoshis
     global rpc_connection
     unspent = await get_unspent_transactions()
     random.shuffle(unspent)
     valid_unspent = []
     reviewed_utxos = 0
     for tx in unspent:
-        if not tx['spendable'] or tx['address'] == burn_address or tx['generated'] or tx['amount'] < value:
+        tx['amount_in_patoshis'] = psl_to_patoshis(tx['amount'])
+        if not tx['spendable'] or tx['address'] == burn_address or tx['generated'] or tx['amount_in_patoshis'] < value:
             continue  # Skip UTXOs that are not spendable or belong to the burn address or which are coinbase transactions
         valid_unspent.append(tx)
         reviewed_utxos += 1
         if reviewed_utxos >= number_of_utxos_to_review:
             break  # Stop reviewing UTXOs if the limit is reached
     # Sort the valid UTXOs by the amount to prioritize larger amounts
-    valid_unspent.sort(key=lambda x: x['amount'], reverse=True)
+    valid_unspent.sort(key=lambda x: x['amount_in_patoshis'], reverse=True)
     selected_txins = []
     total_amount = 0
     for tx in valid_unspent:
         # Check if the wallet has the private key for the UTXO's address
-        address_info = await rpc_connection.validateaddress(tx['address'])
-        if not address_info['ismine'] and not address_info['iswatchonly']:
+        if not await address_is_mine(tx['address']):
             continue  # Skip this UTXO if the wallet doesn't have the private key
         # Check if the UTXO is still valid and unspent
         txout = await rpc_connection.gettxout(tx['txid'], tx['vout'])
         if txout is None:
             continue  # Skip UTXOs that are not found or already spent        
         selected_txins.append(tx)
-        total_amount += tx['amount']
+        total_amount += tx['amount_in_patoshis']
         if total_amount >= value:
             break
     if total_amount < value:
         raise Exception("Insufficient funds")
     else:
-        return selected_txins, Decimal(total_amount)
+        return selected_txins, total_amount
     
 
 def pushint(n):
     assert 0 < n <= 16
     return bytes([0x51 + n-1])
     
-def checkmultisig_scriptpubkey_dump(fd):
-    data = fd.read(65*3)
-    if not data:
-        return None
-    r = pushint(1)
+def calculate_chunks(data, chunk_size):
+    # Yields zero-copy memoryview windows; callers only materialize bytes where a copy is unavoidable
+    data_view = memoryview(data)
+    for offset in range(0, len(data_view), chunk_size):
+        yield data_view[offset:offset+chunk_size]
+
+def checkmultisig_scriptpubkey_dump(data):
+    # data is a bytes-like window of up to MULTISIG_OUTPUT_DATA_SIZE bytes (a memoryview slice from store_data_in_blockchain)
+    r = bytearray(pushint(1))
     n = 0
-    while data:
-        chunk = data[0:65]
-        data = data[65:]
+    for chunk in calculate_chunks(data, 65):
         if len(chunk) < 33:
-            chunk += b'\x00'*(33-len(chunk))
+            chunk = bytes(chunk) + b'\x00'*(33-len(chunk))
         elif len(chunk) < 65:
-            chunk += b'\x00'*(65-len(chunk))
+            chunk = bytes(chunk) + b'\x00'*(65-len(chunk))
         r += pushdata(chunk)
         n += 1
     r += pushint(n) + OP_CHECKMULTISIG
-    return r
+    return bytes(r)
+
+def extract_checkmultisig_pushdata(script_pubkey):
+    # Inverse of checkmultisig_scriptpubkey_dump: OP_1 <pubkey push>... OP_n OP_CHECKMULTISIG; each push is 33 or 65 bytes so its opcode is the length
+    pushed_data = bytearray()
+    position = 1
+    end = len(script_pubkey) - 2
+    while position < end:
+        length = script_pubkey[position]
+        pushed_data += script_pubkey[position+1:position+1+length]
+        position += 1 + length
+    return bytes(pushed_data)
+
+def decode_ticket_data_from_multisig_scripts(script_pubkeys):
+    # Concatenates the pushed data of the data outputs and returns the ticket bytes (header + compressed data, possibly zero-padded)
+    reconstructed_combined_data = b''.join(extract_checkmultisig_pushdata(script_pubkey) for script_pubkey in script_pubkeys)
+    if reconstructed_combined_data.startswith(STORAGE_TICKET_IDENTIFIER.encode('utf-8')):
+        return reconstructed_combined_data  # Trailing zero padding is dropped by callers via the compressed data length
+    # Tickets stored before the switch to raw bytes hold the hex text of the ticket data, zero-padded at the end
+    return unhexlify(reconstructed_combined_data.rstrip(b'\x00'))
     
 def addr2bytes(s):
     digits58 = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
@@ -300,19 +399,19 @@ def pushdata(data):
     elif length <= 0xff:
         return b'\x4c' + bytes([length]) + data
     elif length <= 0xffff:
-        return b'\x4d' + struct.pack('<H', length) + data
+        return b'\x4d' + _LE_H(length) + data
     else:
-        return b'\x4e' + struct.pack('<I', length) + data
+        return b'\x4e' + _LE_I(length) + data
 
 def varint(n):
     if n < 0xfd:
         return bytes([n])
     elif n <= 0xffff:
-        return b'\xfd' + struct.pack('<H', n)
+        return b'\xfd' + _LE_H(n)
     elif n <= 0xffffffff:
-        return b'\xfe' + struct.pack('<I', n)
+        return b'\xfe' + _LE_I(n)
     else:
-        return b'\xff' + struct.pack('<Q', n)
+        return b'\xff' + _LE_Q(n)
             
 class CTxIn:
     def __init__(self, prevout_hash, prevout_n, script_sig=b'', sequence=0xffffffff):
@@ -338,34 +437,35 @@ class CMutableTransaction:
         self.binding_sig = b'\x00' * 64  # Placeholder binding signature
 
 def packtx(tx):
-    # Serialize transaction fields
-    tx_data = struct.pack('<I', tx.version)  # Transaction version (4 bytes)
-    tx_data += struct.pack('<I', tx.version_group_id)  # Version group ID (4 bytes)
+    # Serialize into one growing bytearray instead of re-concatenating immutable bytes for every field
+    tx_data = bytearray()
+    tx_data += _LE_I(tx.version)  # Transaction version (4 bytes)
+    tx_data += _LE_I(tx.version_group_id)  # Version group ID (4 bytes)
     # Serialize transaction inputs
     tx_data += varint(len(tx.vin))  # Number of inputs (varint)
     for txin in tx.vin:
         tx_data += txin.prevout_hash[::-1]  # Transaction ID (32 bytes) in little-endian
-        tx_data += struct.pack('<I', txin.prevout_n)  # Output index (4 bytes)
+        tx_data += _LE_I(txin.prevout_n)  # Output index (4 bytes)
         tx_data += varint(len(txin.script_sig))  # scriptSig length (varint)
         tx_data += txin.script_sig  # scriptSig (variable length)        
-        tx_data += struct.pack('<I', txin.sequence)  # Sequence number (4 bytes)
+        tx_data += _LE_I(txin.sequence)  # Sequence number (4 bytes)
     # Serialize transaction outputs
     tx_data += varint(len(tx.vout))  # Number of outputs (varint)
     for txout in tx.vout:
-        output_value = int(txout[0]*COIN)
+        output_value = txout[0]  # Already in patoshis
         if 0 <= output_value <= 0xffffffffffffffff:
-            tx_data += struct.pack('<Q', output_value)  # Transaction amount in patoshis (8 bytes)
+            tx_data += _LE_Q(output_value)  # Transaction amount in patoshis (8 bytes)
         else:
             logger.error(f"Invalid output value: {output_value}. Skipping this output.")        
         tx_data += varint(len(txout[1]))  # scriptPubKey length (varint)
         tx_data += txout[1]  # scriptPubKey (variable length)
-    tx_data += struct.pack('<I', tx.lock_time)  # Locktime (4 bytes)
-    tx_data += struct.pack('<I', tx.expiry_height)  # Expiry height (4 bytes)
+    tx_data += _LE_I(tx.lock_time)  # Locktime (4 bytes)
+    tx_data += _LE_I(tx.expiry_height)  # Expiry height (4 bytes)
     if 0 <= tx.value_balance <= 0xffffffffffffffff:
-        tx_data += struct.pack('<Q', tx.value_balance)  # Value balance (8 bytes)
+        tx_data += _LE_Q(tx.value_balance)  # Value balance (8 bytes)
     else:
         logger.error(f"Invalid value balance: {tx.value_balance}. Setting it to 0.")
-        tx_data += struct.pack('<Q', 0)  # Set value balance to 0 if it's outside the valid range    
+        tx_data += _LE_Q(0)  # Set value balance to 0 if it's outside the valid range    
     # Serialize Sapling-specific fields
     tx_data += varint(len(tx.vShieldedSpend))  # Number of shielded spends (varint)
     tx_data += varint(len(tx.vShieldedOutput))  # Number of shielded outputs (varint)
@@ -376,57 +476,69 @@ def packtx(tx):
         tx_data += varint(0)  # No shielded outputs    
     if tx.vShieldedSpend or tx.vShieldedOutput:
         consensus_branch_id = 0x5efaaeef  # Vermeer consensus branch ID
-        tx_data += struct.pack('<I', consensus_branch_id)  # Consensus branch ID (4 bytes)
+        tx_data += _LE_I(consensus_branch_id)  # Consensus branch ID (4 bytes)
         tx_data += tx.binding_sig  # Binding signature (64 bytes)
-    return tx_data
+    return bytes(tx_data)
     
 async def store_data_in_blockchain(input_data):
     global rpc_connection
     try:    
-        compressed_data = compress_data(input_data)
-        uncompressed_data_hash = get_raw_sha3_256_hash(input_data)
-        compressed_data_hash = get_raw_sha3_256_hash(compressed_data)
+        if isinstance(input_data, str):
+            input_data = input_data.encode('utf-8')
+        # Compression and hashing run in worker threads (zstd and hashlib release the GIL) so other RPCs keep progressing meanwhile
+        compressed_data = await asyncio.to_thread(compress_data, input_data)
+        uncompressed_data_hash, compressed_data_hash = await asyncio.gather(
+            asyncio.to_thread(_sha256, input_data), asyncio.to_thread(_sha256, compressed_data))
         compressed_data_length = len(compressed_data)
-        identifier = "CREDIT_PACK_STORAGE_TICKET"
-        identifier_padded = identifier.encode('utf-8').ljust(32, b'\x00')  # Pad the identifier to 32 bytes
+        if compressed_data_length > 0xffff:
+            raise ValueError(f"Compressed data length of {compressed_data_length:,} bytes does not fit in the 2-byte length field of the ticket header")
+        identifier_padded = STORAGE_TICKET_IDENTIFIER.encode('utf-8').ljust(32, b'\x00')  # Pad the identifier to 32 bytes
         header = identifier_padded + compressed_data_length.to_bytes(2, 'big') + uncompressed_data_hash + compressed_data_hash
-        data_with_header = header + compressed_data
-        combined_data_hex = hexlify(data_with_header)
-        txins, change = await select_txins(0.00001)
+        data_with_header = header + compressed_data  # Stored as raw bytes (not hex text) to halve the on-chain footprint
+        # Every data chunk goes into one transaction as its own multisig output; these don't depend on any RPC result, so build them up front
+        multisig_txouts = [(MULTISIG_OUTPUT_VALUE_IN_PATOSHIS, checkmultisig_scriptpubkey_dump(output_data)) for output_data in calculate_chunks(data_with_header, MULTISIG_OUTPUT_DATA_SIZE)]
+        multisig_outputs_size_in_bytes = sum(8 + len(varint(len(script_pubkey))) + len(script_pubkey) for _, script_pubkey in multisig_txouts)
+        if multisig_outputs_size_in_bytes > MAX_STANDARD_TX_SIZE:
+            raise ValueError(f"Data outputs alone take {multisig_outputs_size_in_bytes:,} bytes, above the {MAX_STANDARD_TX_SIZE:,} byte transaction size limit")
+        # select_txins only picks UTXOs that individually cover the target, so the transaction has a single input; size it with placeholder input and P2PKH outputs to get the fee before selecting
+        p2pkh_placeholder_script_pubkey = OP_DUP + OP_HASH160 + pushdata(bytes(20)) + OP_EQUALVERIFY + OP_CHECKSIG
+        draft_transaction = CMutableTransaction()
+        draft_transaction.vin = [CTxIn(bytes(32), 0)]
+        draft_transaction.vout = multisig_txouts + [(BASE_TRANSACTION_AMOUNT_IN_PATOSHIS, p2pkh_placeholder_script_pubkey), (0, p2pkh_placeholder_script_pubkey)]
+        estimated_fee = -(-(len(packtx(draft_transaction)) + P2PKH_SCRIPTSIG_MAX_SIZE) * FEEPERKB_IN_PATOSHIS // 1000)
+        required_amount = MULTISIG_OUTPUT_VALUE_IN_PATOSHIS*len(multisig_txouts) + BASE_TRANSACTION_AMOUNT_IN_PATOSHIS + estimated_fee
+        # UTXO selection and the two new-address lookups are independent RPCs, so issue them concurrently
+        (txins, change), receiving_address, change_address = await asyncio.gather(
+            select_txins(required_amount), rpc_connection.getnewaddress(), rpc_connection.getnewaddress())
         raw_transaction = CMutableTransaction()
         raw_transaction.vin = [CTxIn(unhexlify(txin['txid']), txin['vout']) for txin in txins]
-        txouts = []
-        fd = io.BytesIO(combined_data_hex)
-        while True:
-            script_pubkey = checkmultisig_scriptpubkey_dump(fd)
-            if script_pubkey is None:
-                break
-            value = round(Decimal(100/COIN), 5)            
-            txouts.append((value, script_pubkey))
-            change -= value   
-        out_value = round(base_transaction_amount, 5) 
+        txouts = multisig_txouts
+        change -= MULTISIG_OUTPUT_VALUE_IN_PATOSHIS*len(multisig_txouts)
+        out_value = BASE_TRANSACTION_AMOUNT_IN_PATOSHIS
         change -= out_value
-        receiving_address = await rpc_connection.getnewaddress()
-        txouts.append((float(out_value), OP_DUP + OP_HASH160 + pushdata(addr2bytes(receiving_address)) + OP_EQUALVERIFY + OP_CHECKSIG))
-        change_address = await rpc_connection.getnewaddress() # change output
-        txouts.append([round(float(change), 5), OP_DUP + OP_HASH160 + pushdata(addr2bytes(change_address)) + OP_EQUALVERIFY + OP_CHECKSIG])
+        txouts.append((out_value, OP_DUP + OP_HASH160 + pushdata(addr2bytes(receiving_address)) + OP_EQUALVERIFY + OP_CHECKSIG))
+        txouts.append([change, OP_DUP + OP_HASH160 + pushdata(addr2bytes(change_address)) + OP_EQUALVERIFY + OP_CHECKSIG])
         logger.info(f"Original Data length: {len(input_data):,} bytes; Compressed data length: {len(compressed_data):,} bytes; Number of multisig outputs: {len(txouts):,}; Total size of multisig outputs in bytes: {sum(len(txout[1]) for txout in txouts):,}") 
         raw_transaction.vout = txouts        
-        unsigned_tx = packtx(raw_transaction)
-        signed_tx_before_fees = await rpc_connection.signrawtransaction(hexlify(unsigned_tx).decode('utf-8'))
-        fee = round(Decimal(len(signed_tx_before_fees)/1000) * FEEPERKB, 5)
+        # The change amount doesn't affect the serialized size, so the signed size (and thus the fee) can be estimated from the unsigned tx plus one P2PKH scriptSig per input
+        estimated_signed_transaction_size_in_bytes = len(packtx(raw_transaction)) + len(txins)*P2PKH_SCRIPTSIG_MAX_SIZE
+        if estimated_signed_transaction_size_in_bytes > MAX_STANDARD_TX_SIZE:
+            raise ValueError(f"Estimated signed transaction size of {estimated_signed_transaction_size_in_bytes:,} bytes exceeds the {MAX_STANDARD_TX_SIZE:,} byte transaction size limit")
+        fee = -(-estimated_signed_transaction_size_in_bytes * FEEPERKB_IN_PATOSHIS // 1000)  # Round up to a whole patoshi
         if fee > change:
-            logger.error(f"Transaction fee exceeds change amount. Fee: {fee:.5f} PSL; Change: {change:.5f} PSL")
+            logger.error(f"Transaction fee exceeds change amount. Fee: {fee/COIN:.5f} PSL; Change: {change/COIN:.5f} PSL")
             change = 0
         else:
             change -= fee
-        txouts[-1][0] = round(float(max(change, 0)), 5)
+        txouts[-1][0] = max(change, 0)
         final_tx = packtx(raw_transaction)
-        signed_tx_after_fees = await rpc_connection.signrawtransaction(hexlify(final_tx).decode('utf-8'))
-        assert(signed_tx_after_fees['complete'])
-        hex_signed_transaction = signed_tx_after_fees['hex']
+        signed_tx = await rpc_connection.signrawtransaction(hexlify(final_tx).decode('utf-8'))
+        assert(signed_tx['complete'])
+        hex_signed_transaction = signed_tx['hex']
         final_signed_transaction_size_in_bytes = len(hex_signed_transaction)/2
-        logger.info(f"Final signed transaction size: {final_signed_transaction_size_in_bytes:,} bytes; Overall expansion factor versus compressed data size: {final_signed_transaction_size_in_bytes/len(compressed_data):.2f}; Total transaction fee: {fee:.5f} PSL")
+        if final_signed_transaction_size_in_bytes > estimated_signed_transaction_size_in_bytes:
+            logger.warning(f"Signed transaction size ({final_signed_transaction_size_in_bytes:,} bytes) exceeds the size estimate used for the fee ({estimated_signed_transaction_size_in_bytes:,} bytes)")
+        logger.info(f"Final signed transaction size: {final_signed_transaction_size_in_bytes:,} bytes; Overall expansion factor versus compressed data size: {final_signed_transaction_size_in_bytes/len(compressed_data):.2f}; Total transaction fee: {fee/COIN:.5f} PSL")
         logger.info(f"Sending data transaction to address: {receiving_address}")
         txid = await rpc_connection.sendrawtransaction(hex_signed_transaction)
         logger.info(f"TXID of Data Transaction: {txid}")
@@ -442,16 +554,8 @@ async def retrieve_data_from_blockchain(txid):
         # Get the raw transaction from the blockchain using the transaction ID
         raw_transaction = await rpc_connection.getrawtransaction(txid, 1)  # Verbose output includes decoded data
         outputs = raw_transaction['vout']  # Extract outputs from the transaction
-        # Concatenate all scriptPubKey hex strings excluding the last two (change and receiving address outputs)
-        encoded_hex_data = ''.join(output['scriptPubKey']['hex'][4:-4] for output in outputs[:-2])
-        # Decode the hex data to bytes and clean up extraneous characters and padding
-        reconstructed_combined_data = unhexlify(encoded_hex_data)
-        reconstructed_combined_data_cleaned = reconstructed_combined_data.decode('utf-8').replace("A", "").rstrip("\x00")
-        if len(reconstructed_combined_data_cleaned) % 2 != 0:
-            reconstructed_combined_data_cleaned = reconstructed_combined_data_cleaned.replace("!","")
-        if len(reconstructed_combined_data_cleaned) % 2 != 0:
-            reconstructed_combined_data_cleaned = reconstructed_combined_data_cleaned[:-1]  # Remove any trailing characters
-        data_buffer = unhexlify(reconstructed_combined_data_cleaned)
+        # Decode the data held in all multisig outputs excluding the last two (change and receiving address outputs)
+        data_buffer = decode_ticket_data_from_multisig_scripts(unhexlify(output['scriptPubKey']['hex']) for output in outputs[:-2])
         # Extract the identifier
         identifier_padded = data_buffer[:32]
         identifier = identifier_padded.rstrip(b'\x00').decode('utf-8')
@@ -467,12 +571,12 @@ async def retrieve_data_from_blockchain(txid):
         compressed_data = data_buffer[:compressed_data_length]
         data_buffer = data_buffer[compressed_data_length:]  # Remove the compressed data from the buffer
         # Validate the compressed data hash
-        if get_raw_sha3_256_hash(compressed_data) != compressed_data_hash:
+        if not await asyncio.to_thread(_digest_matches, compressed_data, compressed_data_hash):
             logger.error("Compressed data hash verification failed")
             return None
         # Decompress the data and validate the uncompressed data hash and length
-        decompressed_data = decompress_data(compressed_data)
-        if get_raw_sha3_256_hash(decompressed_data) != uncompressed_data_hash:
+        decompressed_data = await asyncio.to_thread(decompress_data, compressed_data)
+        if not await asyncio.to_thread(_digest_matches, decompressed_data, uncompressed_data_hash):
             logger.error("Uncompressed data hash verification failed")
             return None
         # Log successful retrieval and return the decompressed data
@@ -485,28 +589,14 @@ async def retrieve_data_from_blockchain(txid):
     
 def get_local_rpc_settings_func(directory_with_pastel_conf=os.path.expanduser("~/.pastel/")):
     with open(os.path.join(directory_with_pastel_conf, "pastel.conf"), 'r') as f:
-        lines = f.readlines()
-    other_flags = {}
+        pastel_conf_text = f.read()
+    # Single regex pass over the whole file; blank lines, comments and lines without '=' simply don't match
+    other_flags = dict(_pastel_conf_setting_pattern.findall(pastel_conf_text))
     rpchost = '127.0.0.1'
-    rpcport = '19932'
-    for line in lines:
-        if line.startswith('rpcport'):
-            value = line.split('=')[1]
-            rpcport = value.strip()
-        elif line.startswith('rpcuser'):
-            value = line.split('=')[1]
-            rpcuser = value.strip()
-        elif line.startswith('rpcpassword'):
-            value = line.split('=')[1]
-            rpcpassword = value.strip()
-        elif line.startswith('rpchost'):
-            pass
-        elif line == '\n':
-            pass
-        else:
-            current_flag = line.strip().split('=')[0].strip()
-            current_value = line.strip().split('=')[1].strip()
-            other_flags[current_flag] = current_value
+    rpcport = other_flags.pop('rpcport', '19932')
+    rpcuser = other_flags.pop('rpcuser', None)
+    rpcpassword = other_flags.pop('rpcpassword', None)
+    other_flags.pop('rpchost', None)
     return rpchost, rpcport, rpcuser, rpcpassword, other_flags
 
 rpc_host, rpc_port, rpc_user, rpc_password, other_flags = get_local_rpc_settings_func()
@@ -807,12 +897,8 @@ if use_direct_ticket_scanning:
         try:
             transaction = deserialize_transaction(raw_transaction_bytes)
             outputs = transaction['vout']  # Extract outputs from the transaction
-            # Concatenate all scriptPubKey hex strings excluding the last two (change and receiving address outputs)
-            encoded_hex_data = ''.join(output['scriptPubKey']['hex'][4:-4] for output in outputs[:-2])
-            # Decode the hex data to bytes and clean up extraneous characters and padding
-            reconstructed_combined_data = bytes.fromhex(encoded_hex_data)
-            reconstructed_combined_data_cleaned = reconstructed_combined_data.decode('utf-8').replace("A", "").rstrip("\x00")
-            data_buffer = bytes.fromhex(reconstructed_combined_data_cleaned)
+            # Decode the data held in all multisig outputs excluding the last two (change and receiving address outputs); vout entries are (value, script_pubkey)
+            data_buffer = decode_ticket_data_from_multisig_scripts(script_pubkey for _, script_pubkey in outputs[:-2])
             # Extract the identifier
             identifier_padded = data_buffer[:32]
             identifier = identifier_padded.rstrip(b'\x00').decode('utf-8')
@@ -828,12 +914,12 @@ if use_direct_ticket_scanning:
             compressed_data = data_buffer[:compressed_data_length]
             data_buffer = data_buffer[compressed_data_length:]  # Remove the compressed data from the buffer
             # Validate the compressed data hash
-            if get_raw_sha3_256_hash(compressed_data) != compressed_data_hash:
+            if not _digest_matches(compressed_data, compressed_data_hash):
                 logger.error("Compressed data hash verification failed")
                 return None
             # Decompress the data and validate the uncompressed data hash and length
             decompressed_data = decompress_data(compressed_data)
-            if get_raw_sha3_256_hash(decompressed_data) != uncompressed_data_hash:
+            if not _digest_matches(decompressed_data, uncompressed_data_hash):
                 logger.error("Uncompressed data hash verification failed")
                 return None
             # Log successful retrieval and return the decompressed data
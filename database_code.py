@@ -8,7 +8,7 @@ from contextlib import asynccontextmanager
 from sqlmodel import Field, SQLModel, Relationship, Column, JSON
 from sqlmodel.ext.asyncio.session import AsyncSession as SQLModelSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text as sql_text
+from sqlalchemy import event, text as sql_text
 from sqlalchemy.ext.asyncio import create_async_engine
 from decouple import Config as DecoupleConfig, RepositoryEnv
         
@@ -874,6 +874,42 @@ class InferenceConfirmation(SQLModel):
 
 engine = create_async_engine(DATABASE_URL, echo=False, future=True, connect_args={"check_same_thread": False}, execution_options={"isolation_level": "SERIALIZABLE"})    
 
+list_of_sqlite_pragma_strings = [
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA cache_size = -262144;",
+    "PRAGMA busy_timeout = 2000;",
+    "PRAGMA wal_autocheckpoint = 100;",
+    "PRAGMA mmap_size = 30000000000;",
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA threads = 4;",
+    "PRAGMA optimize;",
+    "PRAGMA secure_delete = OFF;"
+]
+list_of_sqlite_pragma_justification_strings = [
+    "Set SQLite to use Write-Ahead Logging (WAL) mode (from default DELETE mode) so that reads and writes can occur simultaneously",
+    "Set synchronous mode to NORMAL (from FULL) so that writes are not blocked by reads",
+    "Set cache size to 1GB (from default 2MB) so that more data can be cached in memory and not read from disk; to make this 256MB, set it to -262144 instead",
+    "Increase the busy timeout to 2 seconds so that the database waits",
+    "Set the WAL autocheckpoint to 100 (from default 1000) so that the WAL file is checkpointed more frequently",
+    "Set the maximum size of the memory-mapped I/O cache to 30GB to improve performance by accessing the database file directly from memory",
+    "Keep temporary tables and indices used by sorts and joins in memory instead of in temporary files on disk",
+    "Enable multi-threaded mode in SQLite and set the number of worker threads to 4 to allow concurrent access to the database",
+    "Optimize the database by running a set of optimization steps to improve query performance",
+    "Disable the secure delete feature to improve deletion performance at the cost of potentially leaving deleted data recoverable"
+]
+assert(len(list_of_sqlite_pragma_strings) == len(list_of_sqlite_pragma_justification_strings))
+
+@event.listens_for(engine.sync_engine, "connect")
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # Most of these PRAGMAs are per-connection, so apply them to every connection the pool opens rather than once at startup
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma_string in list_of_sqlite_pragma_strings:
+            cursor.execute(pragma_string)
+    finally:
+        cursor.close()
+
 @asynccontextmanager
 async def Session() -> SQLModelSession:
     async_session = sessionmaker(engine, class_=SQLModelSession, expire_on_commit=False)
@@ -881,38 +917,9 @@ async def Session() -> SQLModelSession:
         yield session
         
 async def initialize_db():
-    list_of_sqlite_pragma_strings = [
-        "PRAGMA journal_mode=WAL;",
-        "PRAGMA synchronous = NORMAL;",
-        "PRAGMA cache_size = -262144;",
-        "PRAGMA busy_timeout = 2000;",
-        "PRAGMA wal_autocheckpoint = 100;",
-        "PRAGMA mmap_size = 30000000000;",
-        "PRAGMA threads = 4;",
-        "PRAGMA optimize;",
-        "PRAGMA secure_delete = OFF;"
-    ]
-    list_of_sqlite_pragma_justification_strings = [
-        "Set SQLite to use Write-Ahead Logging (WAL) mode (from default DELETE mode) so that reads and writes can occur simultaneously",
-        "Set synchronous mode to NORMAL (from FULL) so that writes are not blocked by reads",
-        "Set cache size to 1GB (from default 2MB) so that more data can be cached in memory and not read from disk; to make this 256MB, set it to -262144 instead",
-        "Increase the busy timeout to 2 seconds so that the database waits",
-        "Set the WAL autocheckpoint to 100 (from default 1000) so that the WAL file is checkpointed more frequently",
-        "Set the maximum size of the memory-mapped I/O cache to 30GB to improve performance by accessing the database file directly from memory",
-        "Enable multi-threaded mode in SQLite and set the number of worker threads to 4 to allow concurrent access to the database",
-        "Optimize the database by running a set of optimization steps to improve query performance",
-        "Disable the secure delete feature to improve deletion performance at the cost of potentially leaving deleted data recoverable"
-    ]
-    assert(len(list_of_sqlite_pragma_strings) == len(list_of_sqlite_pragma_justification_strings))
     try:
         async with engine.begin() as conn:
-            try:
-                for pragma_string in list_of_sqlite_pragma_strings:
-                    await conn.execute(sql_text(pragma_string))
-                await conn.run_sync(SQLModel.metadata.create_all)  # Create tables if they don't exist
-            finally:
-                await conn.close()  # Close the connection explicitly
-        await engine.dispose()
+            await conn.run_sync(SQLModel.metadata.create_all)  # Create tables if they don't exist
         return True
     except Exception as e:
         logger.error(f"Database Initialization Error: {e}")
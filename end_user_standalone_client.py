@@ -72,30 +72,18 @@ def setup_logger():
 
 logger = setup_logger()
 
+_pastel_conf_setting_pattern = re.compile(r'^[ \t]*([^\s=#]+)[ \t]*=[ \t]*(.*?)[ \t]*$', re.M)
+
 def get_local_rpc_settings_func(directory_with_pastel_conf=os.path.expanduser("~/.pastel/")):
     with open(os.path.join(directory_with_pastel_conf, "pastel.conf"), 'r') as f:
-        lines = f.readlines()
-    other_flags = {}
+        pastel_conf_text = f.read()
+    # Single regex pass over the whole file; blank lines, comments and lines without '=' simply don't match
+    other_flags = dict(_pastel_conf_setting_pattern.findall(pastel_conf_text))
     rpchost = '127.0.0.1'
-    rpcport = '19932'
-    for line in lines:
-        if line.startswith('rpcport'):
-            value = line.split('=')[1]
-            rpcport = value.strip()
-        elif line.startswith('rpcuser'):
-            value = line.split('=')[1]
-            rpcuser = value.strip()
-        elif line.startswith('rpcpassword'):
-            value = line.split('=')[1]
-            rpcpassword = value.strip()
-        elif line.startswith('rpchost'):
-            pass
-        elif line == '\n':
-            pass
-        else:
-            current_flag = line.strip().split('=')[0].strip()
-            current_value = line.strip().split('=')[1].strip()
-            other_flags[current_flag] = current_value
+    rpcport = other_flags.pop('rpcport', '19932')
+    rpcuser = other_flags.pop('rpcuser', None)
+    rpcpassword = other_flags.pop('rpcpassword', None)
+    other_flags.pop('rpchost', None)
     return rpchost, rpcport, rpcuser, rpcpassword, other_flags
 
 def write_rpc_settings_to_env_file_func(rpc_host, rpc_port, rpc_user, rpc_password, other_flags):